@@ -0,0 +1,27 @@
+"""
+Simple example using msgpack instead of pickle for faster cross-platform serialization.
+
+To run this example, just run:
+    > bbopt ./msgpack_example.py
+"""
+
+# BBopt setup:
+from bbopt import BlackBoxOptimizer
+bb = BlackBoxOptimizer(file=__file__, protocol="msgpack")
+if __name__ == "__main__":
+    bb.run()
+
+
+# Set up uniform and choice parameters.
+x0 = bb.uniform("x0", 0, 10, guess=5)
+x1 = bb.choice("x1", [-10, 0, 10], guess=0)
+
+
+# Set the goal to be the absolute value of the sum.
+y = abs(x0 + x1)
+bb.minimize(y)
+
+
+# Finally, we'll print out the value we used for debugging purposes.
+if __name__ == "__main__":
+    print(repr(y))
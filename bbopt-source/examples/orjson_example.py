@@ -0,0 +1,28 @@
+"""
+Simple example using orjson to write json data files faster.
+
+To run this example, just run:
+    > bbopt ./orjson_example.py
+"""
+
+# BBopt setup:
+from bbopt import BlackBoxOptimizer
+bb = BlackBoxOptimizer(file=__file__, protocol="orjson")
+if __name__ == "__main__":
+    bb.run(alg="random")
+
+
+# Set up uniform and getrandbits parameters (the latter being too big for orjson
+#  to encode, which BBopt takes care of for us).
+x0 = bb.uniform("x0", 0, 10, guess=5)
+seed = bb.getrandbits("seed", 100, guess=2**99)
+
+
+# Set the goal to be x0 plus a small amount depending on the seed.
+y = x0 + seed / 2**100
+bb.minimize(y)
+
+
+# Finally, we'll print out the value we used for debugging purposes.
+if __name__ == "__main__":
+    print(repr(y))
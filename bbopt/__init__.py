@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0xcbc416c4
+# __coconut_hash__ = 0x7ade20ed
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -39,5 +39,13 @@ if _coconut_sys.version_info >= (3,):
 
 
 
+from bbopt import backends as _backends
 from bbopt.backends import *  # register backends
 from bbopt.optimizer import BlackBoxOptimizer  # make optimizer available
+
+
+def __getattr__(name):
+    """Import SkoptBackend and HyperoptBackend on first access (Python 3.7+)."""
+    if name in ("SkoptBackend", "HyperoptBackend"):
+        return getattr(_backends, name)
+    raise AttributeError("module {_coconut_format_0!r} has no attribute {_coconut_format_1!r}".format(_coconut_format_0=(__name__), _coconut_format_1=(name)))
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0x9e00fd81
+# __coconut_hash__ = 0x657ed6a6
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -27,18 +27,56 @@ if _coconut_sys.version_info >= (3,):
 
 
 import traceback
+from importlib import import_module
 
-# import all the other backends to register them
+from bbopt.registry import backend_registry
+from bbopt.registry import alg_registry
+
+# import all the lightweight backends to register them
 from bbopt.backends.serving import ServingBackend
 from bbopt.backends.random import RandomBackend
 from bbopt.backends.mixture import MixtureBackend
-try:
-    from bbopt.backends.skopt import SkoptBackend
-except ImportError:
-    traceback.print_exc()
-    print("Could not import scikit-optimize backend; backend unavailable (see above error).")
-try:
-    from bbopt.backends.hyperopt import HyperoptBackend
-except ImportError:
-    traceback.print_exc()
-    print("Could not import hyperopt backend; backend unavailable (see above error).")
+
+# SkoptBackend and HyperoptBackend are left out since listing them here
+#  would make star imports import them (see __getattr__ below)
+__all__ = ("ServingBackend", "RandomBackend", "MixtureBackend",)
+
+
+# the remaining backends have heavy dependencies, so we only import them (which
+#  registers them) once one of their names is looked up in the registries
+_lazy_backends = {"bbopt.backends.skopt": ("scikit-optimize", "SkoptBackend", "scikit-optimize", ("gaussian_process", "random_forest", "extra_trees", "gradient_boosted_regression_trees",)), "bbopt.backends.hyperopt": ("hyperopt", "HyperoptBackend", "hyperopt", ("tree_structured_parzen_estimator", "annealing",))}
+
+_failed_imports = set()
+
+
+def _import_backend(module_name):
+    """Import the given backend module to register it."""
+    if module_name in _failed_imports:
+        return
+    try:
+        import_module(module_name)
+    except ImportError:
+        _failed_imports.add(module_name)
+        traceback.print_exc()
+        description = _lazy_backends[module_name][0]
+        print("Could not import {_coconut_format_0} backend; backend unavailable (see above error).".format(_coconut_format_0=(description)))
+
+
+def _register_lazy_backends():
+    """Register generators that import the lazy backends when they're first looked up."""
+    for module_name, (description, class_name, backend_name, alg_names) in _lazy_backends.items():
+        import_gen = _coconut.functools.partial(_import_backend, module_name)
+        backend_registry.register_generator(backend_name, import_gen)
+        for alg_name in alg_names:
+            alg_registry.register_generator(alg_name, import_gen)
+
+
+_register_lazy_backends()
+
+
+def __getattr__(name):
+    """Import SkoptBackend and HyperoptBackend on first access (Python 3.7+)."""
+    for module_name, (description, class_name, backend_name, alg_names) in _lazy_backends.items():
+        if name == class_name:
+            return getattr(import_module(module_name), name)
+    raise AttributeError("module {_coconut_format_0!r} has no attribute {_coconut_format_1!r}".format(_coconut_format_0=(__name__), _coconut_format_1=(name)))
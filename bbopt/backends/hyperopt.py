@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0x8674fa01
+# __coconut_hash__ = 0xdce98976
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -42,8 +42,8 @@ from hyperopt.base import spec_from_misc
 
 from bbopt.util import sorted_items
 from bbopt.backends.util import Backend
-from bbopt.backends.util import negate_objective
-from bbopt.backends.util import make_features
+from bbopt.backends.util import split_examples
+from bbopt.backends.util import split_columns
 
 
 # Utilities:
@@ -78,29 +78,24 @@ def create_space(name, func, *args):
     raise TypeError("insufficiently specified parameter {_coconut_format_0}".format(_coconut_format_0=(name)))
 
 
-def examples_to_trials(examples, params):
-    """Create hyperopt trials from the given examples."""
+def examples_to_trials(examples, params, columns=None):
+    """Create hyperopt trials from the given examples (or their ExampleColumns if passed)."""
     trials = []
     NA = object()  # used to mark missing values
 
-    for tid, ex in enumerate(examples):
-
-        _coconut_match_to = ex
-        _coconut_match_check = False
-        if _coconut.isinstance(_coconut_match_to, _coconut.abc.Mapping):
-            _coconut_match_temp_0 = _coconut_match_to.get("gain", _coconut_sentinel)
-            if _coconut_match_temp_0 is not _coconut_sentinel:
-                gain = _coconut_match_temp_0
-                _coconut_match_check = True
-        if _coconut_match_check:
-            loss = negate_objective(gain)
-        else:
-            loss = ex["loss"]
+    split_options = dict(fallback_func=lambda name, func, *args, **kwargs: NA, converters={"choice": lambda val, choices: choices.index(val), "randrange": lambda val, start, stop, step: val - start}, convert_fallback=False)
+    if columns is None:
+        data_points, losses = split_examples(examples, params, **split_options)
+    else:
+        data_points, losses = split_columns(columns, params, **split_options)
+
+    for tid, (features, loss) in enumerate(zip(data_points, losses)):
+
         result = {"status": STATUS_OK, "loss": loss}
 
         vals = {}
         idxs = {}
-        for k, v in zip(sorted(params), make_features(ex["values"], params, fallback_func=lambda name, func, *args, **kwargs: NA, converters={"choice": lambda val, choices: choices.index(val), "randrange": lambda val, start, stop, step: val - start}, convert_fallback=False)):
+        for k, v in zip(sorted(params), features):
             vals[k] = [v] if v is not NA else []
             idxs[k] = [tid] if v is not NA else []
 
@@ -116,9 +111,10 @@ def examples_to_trials(examples, params):
 class HyperoptBackend(Backend):
     """The hyperopt backend uses hyperopt for black box optimization."""
     backend_name = "hyperopt"
+    uses_columns = True
     implemented_funcs = ("choice", "randrange", "uniform", "normalvariate",)
 
-    def __init__(self, examples, params, algo=tpe.suggest, rstate=np.random.RandomState(), show_progressbar=False, **options):
+    def __init__(self, examples, params, algo=tpe.suggest, rstate=np.random.RandomState(), show_progressbar=False, columns=None, **options):
         self.init_fallback_backend()
 
         if not examples:
@@ -129,7 +125,7 @@ class HyperoptBackend(Backend):
 
         domain = Domain(self.set_current_values, space)
 
-        trial_list = examples_to_trials(examples, params)
+        trial_list = examples_to_trials(examples, params, columns)
 
         trials = Trials()
         trials.insert_trial_docs(trial_list)
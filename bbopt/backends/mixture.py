@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0xeee76452
+# __coconut_hash__ = 0x64cd86ec
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -38,8 +38,9 @@ class MixtureBackend(Backend):
     of the form [(algorithm, weight)]. The properties selected_alg and selected_backend
     can be used to retrieve which alg/backend is currently being used."""
     backend_name = "mixture"
+    uses_columns = True
 
-    def __init__(self, examples, params, distribution):
+    def __init__(self, examples, params, distribution, columns=None):
         total_weight = sum((weight for alg, weight in distribution))
 
 # generate cutoff points
@@ -60,7 +61,7 @@ class MixtureBackend(Backend):
 
 # initialize backend
         self.selected_backend, options = alg_registry[self.selected_alg]
-        self.backend = init_backend(self.selected_backend, examples, params, **options)
+        self.backend = init_backend(self.selected_backend, examples, params, columns=columns, **options)
 
     def param(self, name, func, *args, **kwargs):
         return self.backend.param(name, func, *args, **kwargs)
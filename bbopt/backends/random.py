@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0x91832a2e
+# __coconut_hash__ = 0x9cd4bc84
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -28,6 +28,8 @@ if _coconut_sys.version_info >= (3,):
 
 import random
 
+import numpy as np
+
 from bbopt.backends.util import Backend
 
 
@@ -35,12 +37,20 @@ class RandomBackend(Backend):
     """The random backend chooses parameter values randomly."""
     backend_name = "random"
     random_functions = {"randrange": random.randrange, "choice": random.choice, "uniform": random.uniform, "triangular": random.triangular, "betavariate": random.betavariate, "expovariate": random.expovariate, "gammavariate": random.gammavariate, "normalvariate": random.gauss, "vonmisesvariate": random.vonmisesvariate, "paretovariate": random.paretovariate, "weibullvariate": random.weibullvariate}
+# numpy equivalents of the above, for generating whole arrays at once
+    numpy_random_functions = {"uniform": np.random.uniform, "normalvariate": np.random.normal}
 
     def param(self, name, func, *args, **kwargs):
         if func not in self.random_functions:
             raise ValueError("unknown random function {_coconut_format_0}".format(_coconut_format_0=(name)))
         return self.random_functions[func](*args)
 
+    def batch_param(self, name, func, shape, *args, **kwargs):
+        """Generate an entire array of values for the given parameter at once."""
+        if func not in self.numpy_random_functions:
+            raise ValueError("unknown array random function {_coconut_format_0}".format(_coconut_format_0=(name)))
+        return self.numpy_random_functions[func](*args, size=shape)
+
 
 # Registered names:
 
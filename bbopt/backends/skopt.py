@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0x53b40ec6
+# __coconut_hash__ = 0xb41bfd4
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -34,6 +34,7 @@ from skopt.space import Real
 from bbopt.util import sorted_items
 from bbopt.backends.util import Backend
 from bbopt.backends.util import split_examples
+from bbopt.backends.util import split_columns
 from bbopt.backends.util import make_values
 
 
@@ -69,16 +70,20 @@ def create_dimension(name, func, *args):
 class SkoptBackend(Backend):
     """The scikit-optimize backend uses scikit-optimize for black box optimization."""
     backend_name = "scikit-optimize"
+    uses_columns = True
     implemented_funcs = ("choice", "randrange", "uniform",)
 
-    def __init__(self, examples, params, base_estimator="gp", **options):
+    def __init__(self, examples, params, base_estimator="gp", columns=None, **options):
         self.init_fallback_backend()
 
         if not examples:
             self.current_values = {}
             return
 
-        data_points, losses = split_examples(examples, params)
+        if columns is None:
+            data_points, losses = split_examples(examples, params)
+        else:
+            data_points, losses = split_columns(columns, params)
         dimensions = [create_dimension(name, func, *args) for name, (func, args, kwargs) in sorted_items(params)]
 
         if isinstance(base_estimator, str):
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0xdaaf18f2
+# __coconut_hash__ = 0xee4b2e7a
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -26,12 +26,8 @@ if _coconut_sys.version_info >= (3,):
 
 
 
-if _coconut_sys.version_info < (3, 3):
-    from collections import Iterable
-else:
-    from collections.abc import Iterable
-
 from bbopt.util import sorted_items
+from bbopt.util import negate_objective
 from bbopt.params import param_processor
 from bbopt.registry import backend_registry
 from bbopt.registry import alg_registry
@@ -39,14 +35,6 @@ from bbopt.registry import alg_registry
 
 # Utilities:
 
-def negate_objective(objective):
-    """Take the negative of the given objective (converts a gain into a loss and vice versa)."""
-    if isinstance(objective, Iterable):
-        return (list)(map(negate_objective, objective))
-    else:
-        return -objective
-
-
 def make_features(values, params, fallback_func=param_processor.choose_default_placeholder, converters={}, convert_fallback=True,):
     """Return an iterator of the values for the parameters in sorted order with the given fallback function.
     If passed, converters must map funcs to functions from (value, *args) -> new_value which will be run
@@ -132,6 +120,43 @@ def split_examples(examples, params, fallback_func=param_processor.choose_defaul
     return data_points, losses
 
 
+def split_columns(columns, params, fallback_func=param_processor.choose_default_placeholder, converters={}, convert_fallback=True,):
+    """Same as split_examples, but builds the data points a parameter at a time from the given ExampleColumns."""
+    feature_columns = []
+    for name, (func, args, kwargs) in sorted_items(params):
+        converter_func = converters.get(func)
+        feature_column = []
+        for feature in columns.column(name):
+# determine feature
+            fallback = False
+            if feature is columns.missing:
+                _coconut_match_to = kwargs
+                _coconut_match_check = False
+                if _coconut.isinstance(_coconut_match_to, _coconut.abc.Mapping):
+                    _coconut_match_temp_0 = _coconut_match_to.get("placeholder_when_missing", _coconut_sentinel)
+                    if _coconut_match_temp_0 is not _coconut_sentinel:
+                        placeholder_value = _coconut_match_temp_0
+                        _coconut_match_check = True
+                if _coconut_match_check:
+                    feature = placeholder_value
+                else:
+                    fallback = True
+                    feature = fallback_func(name, func, *args, **kwargs)
+
+# run converter
+            if converter_func is not None and (not fallback or convert_fallback):
+                feature = converter_func(feature, *args)
+
+            feature_column.append(feature)
+        feature_columns.append(feature_column)
+
+    if feature_columns:
+        data_points = (list)(map(list, zip(*feature_columns)))
+    else:
+        data_points = [[] for _ in range(len(columns))]
+    return data_points, list(columns.losses)
+
+
 def make_values(params, point):
     """Return a dictionary with the values replaced by the values in point,
     where point is a list of the values corresponding to the sorted params."""
@@ -203,6 +228,10 @@ class Backend(_coconut.object):
 #  default fallback_func implementation
     fallback_backend = None
 
+# derived classes can set this if they want to be passed an
+#  ExampleColumns of the examples as the columns keyword argument
+    uses_columns = False
+
     def __init__(self, examples=None, params=None, **options):
         """Call this if you want to set fallback_backend to a random backend."""
         if options:
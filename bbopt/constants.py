@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0xafd3ea0c
+# __coconut_hash__ = 0x3646ef66
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -42,7 +42,7 @@ author_email = "evanjhub@gmail.com"
 classifiers = ("Development Status :: 3 - Alpha", "License :: OSI Approved :: Apache Software License", "Topic :: Software Development :: Libraries :: Python Modules", "Operating System :: OS Independent",)
 requirements = ("numpy>=1.0", "portalocker>=1.4", "scikit-optimize>=0.5.2", "hyperopt>=0.1.2", "networkx>=1.0,<2.0",)
 extra_requirements = {":python_version<'3'": ("futures>=3.2",), "examples": ("keras", "scikit-learn",)}
-extra_requirements["dev"] = (extra_requirements["examples"] + ("coconut-develop", "pytest>=3.0",))
+extra_requirements["dev"] = (extra_requirements["examples"] + ("coconut-develop", "pytest>=3.0", "msgpack>=0.6.1", "orjson",))
 
 
 # Optimizer constants:
@@ -50,6 +50,10 @@ data_file_ext = ".bbopt"
 lock_timeout = 5
 default_alg = "tree_structured_parzen_estimator"
 default_protocol = 2
+compaction_interval = 100
+fsync_interval = 10
+msgpack_big_int_code = 1
+data_state_tail_len = 64
 
 
 # CLI constants:
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0x99975b18
+# __coconut_hash__ = 0x53c931a2
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -28,16 +28,30 @@ if _coconut_sys.version_info >= (3,):
 
 import os
 import json
+import atexit
 if _coconut_sys.version_info < (3,):
     import cPickle as pickle
 else:
     import pickle
 import math
-import itertools
 import time
+from operator import itemgetter
+from bisect import bisect_left
+if _coconut_sys.version_info < (3, 3):
+    from collections import Hashable
+else:
+    from collections.abc import Hashable
 
 import numpy as np
 from portalocker import Lock
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from bbopt.registry import backend_registry
 from bbopt.registry import init_backend
@@ -46,15 +60,52 @@ from bbopt.params import param_processor
 from bbopt.util import Str
 from bbopt.util import norm_path
 from bbopt.util import json_serialize
+from bbopt.util import has_nonfinite
 from bbopt.util import best_example
 from bbopt.util import sync_file
 from bbopt.util import ensure_file
 from bbopt.util import clear_file
 from bbopt.util import denumpy_all
+from bbopt.util import file_state
+from bbopt.util import ExampleColumns
 from bbopt.constants import data_file_ext
 from bbopt.constants import lock_timeout
 from bbopt.constants import default_alg
 from bbopt.constants import default_protocol
+from bbopt.constants import compaction_interval
+from bbopt.constants import fsync_interval
+from bbopt.constants import msgpack_big_int_code
+from bbopt.constants import data_state_tail_len
+
+
+# data files with appended runs that haven't been fsynced yet
+_unsynced_files = set()
+
+
+@atexit.register
+def _sync_unsynced_files():
+    """Make sure any appended runs we haven't fsynced yet make it to disk before exiting."""
+    for fpath in _unsynced_files:
+        try:
+            with open(fpath, "rb+") as df:
+                sync_file(df)
+        except OSError:
+            pass
+
+
+def _msgpack_default(obj):
+    """Serialize obj for encoding in msgpack."""
+# msgpack only supports 64-bit ints natively, but calls this on any that overflow
+    if isinstance(obj, int):
+        return msgpack.ExtType(msgpack_big_int_code, str(obj).encode(encoding="utf-8"))
+    return json_serialize(obj)
+
+
+def _msgpack_ext_hook(code, data):
+    """Deserialize msgpack ext types written by _msgpack_default."""
+    if code == msgpack_big_int_code:
+        return int(str(data, encoding="utf-8"))
+    return msgpack.ExtType(code, data)
 
 
 class BlackBoxOptimizer(_coconut.object):
@@ -65,14 +116,24 @@ class BlackBoxOptimizer(_coconut.object):
         if not isinstance(file, Str):
             raise TypeError("file must be a string")
         self._file = norm_path(file)
+# every protocol's data file is this plus its own extension
+        self._data_file_base = os.path.splitext(self._file)[0] + data_file_ext
 
         if protocol is None:
 # auto-detect protocol
-            self._protocol = "json"
-            if not os.path.exists(self.data_file):
-                self._protocol = default_protocol
+            for protocol in ("json", "msgpack"):
+                self._set_protocol(protocol)
+                if os.path.exists(self.data_file):
+                    break
+            else:
+                self._set_protocol(default_protocol)
         else:
-            self._protocol = protocol
+            self._set_protocol(protocol)
+
+        if self._protocol == "msgpack" and msgpack is None:
+            raise ImportError("protocol='msgpack' requires msgpack (run 'pip install msgpack' to fix)")
+        if self._protocol == "orjson" and orjson is None:
+            raise ImportError("protocol='orjson' requires orjson (run 'pip install orjson' to fix)")
 
         self.reload()
 
@@ -80,33 +141,106 @@ class BlackBoxOptimizer(_coconut.object):
         """Completely reload the optimizer."""
         self._old_params = {}
         self._examples = []
+        self._ex_columns = ExampleColumns()
+        self._example_timestamps = set()
+        self._best_example = {"values": {}}
+        self._num_records = 0
+        self._appends_since_sync = 0
+        self._data_state = None
+        self._data_tail = b""
+        self._nonfinite_examples = False  # whether any examples contain NaN or infinite values
         self._load_data()
-        self.run(alg=None)  # backend is set to serving by default
-
-    @property
-    def _use_json(self):
-        """Whether we are currently saving in json or pickle."""
-        return self._protocol == "json"
-
-    def _loads(self, raw_contents):
-        """Load data from the given raw data string."""
+# backend is set to serving by default, but we only build it once it's needed
+        self._backend = None
+        self._new_params = {}
+        self._current_example = {"values": {}}
+        self._got_reward = False  # whether we have seen a maximize/minimize call yet
+
+    def _set_protocol(self, protocol):
+        """Set the protocol and precompute everything that depends on it."""
+        self._protocol = protocol
+# whether we are saving in json (through either json or orjson)
+        self._use_json = protocol in ("json", "orjson")
+# whether we save by appending records to the data file (pickle and msgpack)
+#  rather than by rewriting it (json, which has to stay a single document)
+        self._use_journal = not self._use_json
         if self._use_json:
-            return json.loads(str(raw_contents, encoding="utf-8"))
+            protocol_ext = ".json"
+        elif protocol == "msgpack":
+            protocol_ext = ".msgpack"
         else:
-            return pickle.loads(raw_contents)
+            protocol_ext = ".pickle"
+        self._data_file = self._data_file_base + protocol_ext
+
+    def _loads(self, raw_contents):
+        """Load json data from the given raw data string."""
+        if orjson is not None:
+# orjson is much faster than json and takes bytes directly, but
+#  doesn't support the NaN/Infinity values that json can write
+            try:
+                return orjson.loads(raw_contents)
+            except orjson.JSONDecodeError:
+                pass
+        return json.loads(str(raw_contents, encoding="utf-8"))
 
     def _dumps(self, unserialized_data):
-        """Dump data to a raw data string."""
+        """Dump json data to a raw data string."""
+# orjson silently writes NaN and infinite values as null, so we
+#  fall back to json whenever the data contains any of those
+        if (self._protocol == "orjson" and not self._nonfinite_examples and not has_nonfinite(unserialized_data["params"])):
+            try:
+# orjson only calls json_serialize on objects it can't handle natively
+                return orjson.dumps(unserialized_data, default=json_serialize, option=orjson.OPT_SERIALIZE_NUMPY)
+            except orjson.JSONEncodeError:
+# orjson can't encode ints larger than 64 bits, but json can
+                pass
+        return json.dumps((json_serialize)(unserialized_data)).encode(encoding="utf-8")
+
+    def _load_records(self, df):
+        """Iterate over all the data records in the given file, streaming them
+        straight from the file handle when not using json."""
+        if self._use_json:
+            contents = df.read()
+            if contents:
+                yield self._loads(contents)
+        elif self._protocol == "msgpack":
+# we allow non-str keys since pickle does and msgpack writes them just fine
+            _coconut_yield_from = msgpack.Unpacker(df, raw=False, strict_map_key=False, ext_hook=_msgpack_ext_hook)
+            for _coconut_yield_item in _coconut_yield_from:
+                yield _coconut_yield_item
+
+        else:
+            while True:
+                try:
+                    yield pickle.load(df)
+                except EOFError:
+                    break
+
+    def _dump_to(self, df, record):
+        """Write the given data record to the given file, streaming it
+        straight to the file handle when not using json."""
         if self._use_json:
-            return json.dumps((json_serialize)(unserialized_data)).encode(encoding="utf-8")
+            (df.write)((self._dumps)(record))
+        elif self._protocol == "msgpack":
+            msgpack.pack(record, df, use_bin_type=True, default=_msgpack_default)
         else:
-            return pickle.dumps(unserialized_data, protocol=self._protocol)
+            pickle.dump(record, df, protocol=self._protocol)
 
     def run_backend(self, backend, *args, **options):
         """Optimize parameters using the given backend."""
-        self.backend = init_backend(backend, self._examples, self._old_params, *args, **options)
+        self._backend = init_backend(backend, self._examples, self._old_params, *args, columns=self._ex_columns, **options)
         self._new_params = {}
         self._current_example = {"values": {}}
+        self._got_reward = False
+
+    @property
+    def backend(self):
+        """The backend currently being used to choose parameter values."""
+        if self._backend is None:
+# equivalent to run(alg=None), but without resetting the current run
+            backend, options = alg_registry[None]
+            self._backend = init_backend(backend, self._examples, self._old_params, columns=self._ex_columns, **options)
+        return self._backend
 
     @property
     def algs(self):
@@ -119,13 +253,8 @@ class BlackBoxOptimizer(_coconut.object):
         backend, options = alg_registry[alg]
         self.run_backend(backend, **options)
 
-    @property
-    def _got_reward(self):
-        """Whether we have seen a maximize/minimize call yet."""
-        return "loss" in self._current_example or "gain" in self._current_example
-
-    def _param(self, name, func, *args, **kwargs):
-        """Create a black box parameter and return its value."""
+    def _check_param_name(self, name):
+        """Make sure a new parameter with the given name can be defined."""
         if self._got_reward:
             raise ValueError("all parameter definitions must come before maximize/minimize")
         if not isinstance(name, Str):
@@ -133,6 +262,10 @@ class BlackBoxOptimizer(_coconut.object):
         if name in self._new_params:
             raise ValueError("parameter of name {_coconut_format_0} already exists".format(_coconut_format_0=(name)))
 
+    def _param(self, name, func, *args, **kwargs):
+        """Create a black box parameter and return its value."""
+        self._check_param_name(name)
+
         args = param_processor.standardize_args(func, args)
         kwargs = param_processor.standardize_kwargs(kwargs)
 
@@ -158,7 +291,7 @@ class BlackBoxOptimizer(_coconut.object):
     @property
     def is_serving(self):
         """Whether we are currently using the serving backend or not."""
-        return isinstance(self.backend, backend_registry[None])
+        return self._backend is None or isinstance(self._backend, backend_registry[None])
 
     def _set_reward(self, reward_type, value):
         """Set the gain or loss to the given value."""
@@ -168,26 +301,59 @@ class BlackBoxOptimizer(_coconut.object):
             if len(value.shape) != 1:
                 raise ValueError("gain/loss must be a scalar or 1-dimensional array, not {_coconut_format_0}".format(_coconut_format_0=(value)))
             value = tuple(value)
-        self._current_example[reward_type] = denumpy_all(value)
+# plain Python numbers (the common case) can skip denumpy_all; this has to be an
+#  exact type check since numpy floats are instances of float
+        if type(value) not in (int, float):
+            value = denumpy_all(value)
+        self._current_example[reward_type] = value
+        self._got_reward = True
         if not self.is_serving:
             self._save_data()
 
     @property
     def data_file(self):
         """The path to the file we are saving data to."""
-        return os.path.splitext(self._file)[0] + data_file_ext + (".json" if self._use_json else ".pickle")
+        return self._data_file
 
     def tell_examples(self, examples):
         """Load the given examples into memory."""
+        new_examples = []
         for ex in examples:
-            if ex not in self._examples:
-                self._examples.append(ex)
+# saved examples have unique timestamps, so we can dedupe on
+#  those and only fall back to a linear search when missing
+            _coconut_match_to = ex
+            _coconut_match_check = False
+            if _coconut.isinstance(_coconut_match_to, _coconut.abc.Mapping):
+                _coconut_match_temp_0 = _coconut_match_to.get("timestamp", _coconut_sentinel)
+                if _coconut_match_temp_0 is not _coconut_sentinel:
+                    timestamp = _coconut_match_temp_0
+                    _coconut_match_check = True
+            if _coconut_match_check:
+                if timestamp in self._example_timestamps:
+                    continue
+                self._example_timestamps.add(timestamp)
+            else:
+                if ex in self._examples:
+                    continue
+            self._ex_columns.append(ex)
+            self._examples.append(ex)
+            new_examples.append(ex)
+            if self._protocol == "orjson" and not self._nonfinite_examples:
+                self._nonfinite_examples = has_nonfinite(ex)
+
+# keep track of the best example so far so get_optimal_run doesn't have to rescan
+        if self._best_example is not None:
+            try:
+                self._best_example = best_example(new_examples, self._best_example)
+            except (ValueError, TypeError):
+# mixing gains and losses or incomparable rewards; get_optimal_run
+#  will raise the error if it's ever called
+                self._best_example = None
 
     def _load_from(self, df):
         """Load data from the given file."""
-        contents = df.read()
-        if contents:
-            _coconut_match_to = self._loads(contents)
+        for record in self._load_records(df):
+            _coconut_match_to = record
             _coconut_match_check = False
             if (_coconut.isinstance(_coconut_match_to, _coconut.abc.Mapping)) and (_coconut.len(_coconut_match_to) == 2):
                 _coconut_match_temp_0 = _coconut_match_to.get("params", _coconut_sentinel)
@@ -198,19 +364,44 @@ class BlackBoxOptimizer(_coconut.object):
                     _coconut_match_check = True
             if not _coconut_match_check:
                 _coconut_match_val_repr = _coconut.repr(_coconut_match_to)
-                _coconut_match_err = _coconut_MatchError("pattern-matching failed for " '\'{"params": params, "examples": examples} = self._loads(contents)\'' " in " + (_coconut_match_val_repr if _coconut.len(_coconut_match_val_repr) <= 500 else _coconut_match_val_repr[:500] + "..."))
-                _coconut_match_err.pattern = '{"params": params, "examples": examples} = self._loads(contents)'
+                _coconut_match_err = _coconut_MatchError("pattern-matching failed for " '\'{"params": params, "examples": examples} = record\'' " in " + (_coconut_match_val_repr if _coconut.len(_coconut_match_val_repr) <= 500 else _coconut_match_val_repr[:500] + "..."))
+                _coconut_match_err.pattern = '{"params": params, "examples": examples} = record'
                 _coconut_match_err.value = _coconut_match_to
                 raise _coconut_match_err
 
-            self._old_params = params
+            self._old_params.update(params)
             self.tell_examples(examples)
+            self._num_records += 1
 
     def _load_data(self):
         """Load examples from data file."""
-        ensure_file(self.data_file)
-        with Lock(self.data_file, "rb", timeout=lock_timeout) as df:
+        ensure_file(self._data_file)
+        with Lock(self._data_file, "rb", timeout=lock_timeout) as df:
             self._load_from(df)
+            self._record_data_state(df)
+
+    def _record_data_state(self, df):
+        """Remember the current state of the data file so we can later tell what has changed."""
+        self._data_state = file_state(df)
+        size, _ = self._data_state
+        df.seek(max(0, size - data_state_tail_len))
+        self._data_tail = df.read()
+
+    def _load_new_data(self, df):
+        """Load whatever other processes have written to the data file since we last read it."""
+        last_size, _ = self._data_state
+        tail_start = last_size - len(self._data_tail)
+        df.seek(tail_start)
+        if (self._use_journal and file_state(df)[0] > last_size and df.read(len(self._data_tail)) == self._data_tail):
+# between compactions the journal is only ever appended to, so if it has grown
+#  and still ends the way it did, we only need to read the records after that
+            pass
+        else:
+# someone rewrote the file, so we have to read all of it (tell_examples
+#  skips all the examples we already have)
+            df.seek(0)
+            self._num_records = 0
+        self._load_from(df)
 
     def get_data(self):
         """Get all currently-loaded data as a dictionary containing params and examples."""
@@ -225,14 +416,39 @@ class BlackBoxOptimizer(_coconut.object):
     def _save_data(self):
         """Save examples to data file."""
         assert "timestamp" not in self._current_example, "multiple _save_data calls on _current_example = {_coconut_format_0}".format(_coconut_format_0=(self._current_example))
-        with Lock(self.data_file, "rb+", timeout=lock_timeout) as df:
+        with Lock(self._data_file, "rb+", timeout=lock_timeout) as df:
 # we create the timestamp while we have the lock to ensure its uniqueness
             self._current_example["timestamp"] = time.time()
             self.tell_examples([self._current_example])
-            self._load_from(df)
-            clear_file(df)
-            ((df.write)((self._dumps)(self.get_data())))
-            sync_file(df)
+# if no other process has written to the file since we last read or
+#  wrote all of it, then we already have everything that's in it
+            if file_state(df) != self._data_state:
+                self._load_new_data(df)
+            rewrote = False
+            if self._use_journal and self._num_records < compaction_interval:
+# append just the current run rather than rewriting the whole file (we
+#  still merge the new params in memory so later runs and compaction see them)
+                self._old_params.update(self._new_params)
+                df.seek(0, os.SEEK_END)
+                self._dump_to(df, {"params": self._new_params, "examples": [self._current_example]})
+                self._num_records += 1
+                self._appends_since_sync += 1
+            else:
+# we have everything on disk, so compact it all into a single record
+                clear_file(df)
+                self._dump_to(df, self.get_data())
+                self._num_records = 1
+                rewrote = True
+# appends can only lose the last few runs on a crash, so we only fsync them every
+#  fsync_interval saves (and at exit), but rewrites always need to be fsynced
+            if not rewrote and self._appends_since_sync < fsync_interval:
+                df.flush()
+                _unsynced_files.add(self._data_file)
+            else:
+                sync_file(df)
+                self._appends_since_sync = 0
+                _unsynced_files.discard(self._data_file)
+            self._record_data_state(df)
 
     def get_current_run(self):
         """Return a dictionary containing the current parameters and reward."""
@@ -243,7 +459,9 @@ class BlackBoxOptimizer(_coconut.object):
 
     def get_optimal_run(self):
         """Return a dictionary containing the optimal parameters and reward computed so far."""
-        return best_example(self._examples)
+        if self._best_example is None:
+            return best_example(self._examples)
+        return self._best_example
 
 # Base random functions:
 
@@ -312,13 +530,15 @@ class BlackBoxOptimizer(_coconut.object):
     def loguniform(self, name, min_val, max_val, **kwargs):
         """Create a new parameter with the given name modeled by
         math.exp(random.uniform(math.log(min_val), math.log(max_val)))."""
-        kwargs = (_coconut.functools.partial(param_processor.modify_kwargs, math.log))(kwargs)
+        if kwargs:
+            kwargs = (_coconut.functools.partial(param_processor.modify_kwargs, math.log))(kwargs)
         log_a, log_b = math.log(min_val), math.log(max_val)
         return math.exp(self.uniform(name, log_a, log_b, **kwargs))
 
     def lognormvariate(self, name, mu, sigma, **kwargs):
         """Create a new parameter with the given name modeled by random.lognormvariate(mu, sigma)."""
-        kwargs = (_coconut.functools.partial(param_processor.modify_kwargs, math.log))(kwargs)
+        if kwargs:
+            kwargs = (_coconut.functools.partial(param_processor.modify_kwargs, math.log))(kwargs)
         return math.exp(self.normalvariate(name, mu, sigma, **kwargs))
 
     def randbool(self, name, **kwargs):
@@ -329,18 +549,47 @@ class BlackBoxOptimizer(_coconut.object):
         """Create a new parameter with the given name modeled by random.sample(population, k)."""
         if not isinstance(name, Str):
             raise TypeError("name must be string, not {_coconut_format_0}".format(_coconut_format_0=(name)))
-        sampling_population = [x for x in population]
+        population = [x for x in population]
+# we track the unsampled population by index, keeping remaining sorted
+#  so that positions in it can be found by bisection
+        remaining = list(range(len(population)))
+
+# map elements to their first index in population so that looking up guesses is O(1)
+        first_index = {}
+        all_hashable = True
+        if kwargs:
+            for orig_ind, x in enumerate(population):
+                try:
+                    first_index.setdefault(x, orig_ind)
+                except TypeError:
+                    all_hashable = False
+
+        def remaining_index(elem):
+            """Get the position of elem in the unsampled population (or 0 if it isn't there)."""
+            try:
+                orig_ind = first_index[elem]
+            except (KeyError, TypeError):
+# only unhashable elements can be missing from first_index yet still be in population
+                if (all_hashable and isinstance(elem, Hashable)) or elem not in population:
+                    return 0
+                orig_ind = population.index(elem)
+            ind = bisect_left(remaining, orig_ind)
+            if ind < len(remaining) and remaining[ind] == orig_ind:
+                return ind
+# the first copy of elem was already sampled, so look for a later duplicate
+            for ind, orig_ind in enumerate(remaining):
+                if population[orig_ind] == elem:
+                    return ind
+            return 0
+
         sample = []
         for i in range(k):
-            if len(sampling_population) <= 1:
-                sample.append(sampling_population[0])
+            if len(remaining) <= 1:
+                sample.append(population[remaining[0]])
             else:
-                def _coconut_lambda_0(val):
-                    elem = _coconut_igetitem(val, i)
-                    return sampling_population.index(elem) if elem in sampling_population else 0
-                proc_kwargs = param_processor.modify_kwargs(_coconut_lambda_0, kwargs)
-                ind = self.randrange("{_coconut_format_0}[{_coconut_format_1}]".format(_coconut_format_0=(name), _coconut_format_1=(i)), len(sampling_population), **proc_kwargs)
-                sample.append(sampling_population.pop(ind))
+                proc_kwargs = param_processor.modify_kwargs(lambda val: remaining_index(_coconut_igetitem(val, i)), kwargs)
+                ind = self.randrange("{_coconut_format_0}[{_coconut_format_1}]".format(_coconut_format_0=(name), _coconut_format_1=(i)), len(remaining), **proc_kwargs)
+                sample.append(population[remaining.pop(ind)])
         return sample
 
     def shuffle(self, name, x, **kwargs):
@@ -349,22 +598,40 @@ class BlackBoxOptimizer(_coconut.object):
 
 # Array-based random functions:
 
-    def _array_param(self, func, name, shape, kwargs):
-        """Create a new array parameter for the given name and shape with entries from func."""
+    def _array_param(self, func, args, name, shape, kwargs):
+        """Create a new array parameter for the given name and shape with entries from func(*args)."""
         if not isinstance(name, Str):
             raise TypeError("name must be string, not {_coconut_format_0}".format(_coconut_format_0=(name)))
+        if hasattr(self.backend, "batch_param"):
+            return self._batch_array_param(func, args, name, shape, kwargs)
         arr = np.zeros(shape)
-        for indices in itertools.product(*map(range, shape)):
-            index_str = ",".join(map(str, indices))
-            cell_name = "{_coconut_format_0}[{_coconut_format_1}]".format(_coconut_format_0=(name), _coconut_format_1=(index_str))
-            proc_kwargs = param_processor.modify_kwargs(lambda _=None: _[indices], kwargs)
-            arr[indices] = func(cell_name, **proc_kwargs)
+        for indices, cell_name, cell_kwargs in self._array_cells(name, shape, kwargs):
+            arr[indices] = self._param(cell_name, func, *args, **cell_kwargs)
         return arr
 
+    def _batch_array_param(self, func, args, name, shape, kwargs):
+        """Same as _array_param, but generates the whole array with a single backend.batch_param call."""
+        args = param_processor.standardize_args(func, args)
+        arr = self.backend.batch_param(name, func, shape, *args, **kwargs)
+        for indices, cell_name, cell_kwargs in self._array_cells(name, shape, kwargs):
+            self._check_param_name(cell_name)
+            self._new_params[cell_name] = (func, args, (param_processor.standardize_kwargs)(cell_kwargs))
+            self._current_example["values"][cell_name] = arr.item(indices)
+        return arr
+
+    def _array_cells(self, name, shape, kwargs):
+        """Iterate over (indices, cell_name, cell_kwargs) for every entry of the given array parameter."""
+        name_prefix = name + "["
+        for indices in np.ndindex(*shape):
+            cell_name = name_prefix + ",".join(map(str, indices)) + "]"
+# most array params don't pass any kwargs, so skip indexing into them if we can
+            cell_kwargs = param_processor.modify_kwargs(itemgetter(indices), kwargs) if kwargs else {}
+            yield indices, cell_name, cell_kwargs
+
     def rand(self, name, *shape, **kwargs):
         """Create a new array parameter for the given name and shape modeled by np.random.rand."""
-        return self._array_param(self.random, name, shape, kwargs)
+        return self._array_param("uniform", (0, 1), name, shape, kwargs)
 
     def randn(self, name, *shape, **kwargs):
         """Create a new array parameter for the given name and shape modeled by np.random.randn."""
-        return self._array_param(_coconut_partial(self.normalvariate, {1: 0, 2: 1}, 3), name, shape, kwargs)
+        return self._array_param("normalvariate", (0, 1), name, shape, kwargs)
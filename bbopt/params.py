@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0xa10ab98c
+# __coconut_hash__ = 0xded5bf6e
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -168,6 +168,19 @@ class ParamProcessor(_coconut.object):
 
     def standardize_args(self, func, args):
         """Standardize param func and args."""
+# the same param calls are usually repeated every run, so we cache
+#  standardization of hashable args (including their types, so that
+#  e.g. 1 and True or 1 and 1.0 don't collide)
+        try:
+            args_key = tuple(args)
+            types_key = (tuple)(map(type, args_key))
+            hash(args_key)
+        except TypeError:
+            return self._standardize_args(func, args)
+        return (list)(cached_standardize_args(func, args_key, types_key))
+
+    def _standardize_args(self, func, args):
+        """Standardize param func and args without caching."""
 # denumpy args
         args = denumpy_all(args)
 
@@ -196,3 +209,10 @@ class ParamProcessor(_coconut.object):
 
 
 param_processor = ParamProcessor()
+
+
+@memoize(1024)
+def cached_standardize_args(func, args, arg_types):
+    """Cached version of param_processor.standardize_args for hashable args.
+    Returns a tuple to prevent the cached value from being mutated."""
+    return (tuple)(param_processor._standardize_args(func, args))
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0xcc680b16
+# __coconut_hash__ = 0xd23c861e
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -30,14 +30,16 @@ if _coconut_sys.version_info >= (3,):
 class Registry(_coconut.object):
     """Registry that keeps track of registered objects."""
 
-    def __init__(self, obj_name="obj", defaults=None, generators={}, aliases={}):
+    def __init__(self, obj_name="obj", defaults=None, generators=None, aliases={}):
         self.obj_name = obj_name
         self.registered = {} if defaults is None else defaults
-        self.generators = generators
+        self.generators = {} if generators is None else generators
         self.aliases = aliases
 
     def __getitem__(self, name):
         name = self.aliases.get(name, name)
+        if name in self.generators:
+            self.run_gen(name)
         _coconut_match_to = self.registered
         _coconut_match_check = False
         if _coconut.isinstance(_coconut_match_to, _coconut.abc.Mapping):
@@ -46,48 +48,49 @@ class Registry(_coconut.object):
                 value = _coconut_match_temp_0
                 _coconut_match_check = True
         if _coconut_match_check:
-            return self.registered[name]
+            return value
         else:
-            if name in self.generators:
-                return self.run_gen(name)
-            else:
-                valid_names = ", ".join((repr(name) for name in self))
-                raise ValueError("unknown {_coconut_format_0}: {_coconut_format_1} (valid {_coconut_format_2}s: {_coconut_format_3})".format(_coconut_format_0=(obj_name), _coconut_format_1=(name), _coconut_format_2=(obj_name), _coconut_format_3=(valid_names)))
+            valid_names = ", ".join((repr(name) for name in self))
+            raise ValueError("unknown {_coconut_format_0}: {_coconut_format_1} (valid {_coconut_format_2}s: {_coconut_format_3})".format(_coconut_format_0=(self.obj_name), _coconut_format_1=(name), _coconut_format_2=(self.obj_name), _coconut_format_3=(valid_names)))
 
     def register(self, name, value):
         """Register value under the given name."""
         self.registered[name] = value
 
+    def register_generator(self, name, generator):
+        """Register a generator to be called the first time name is looked up. The generator
+        should either return the value for name or register it itself (and return None)."""
+        self.generators[name] = generator
+
     def register_alias(self, name, alias):
         """Register an alias for the given name."""
         self.aliases[alias] = name
 
     def run_gen(self, name):
         """Run the generator for the given name."""
-        value = self.generators[name]()
+        value = self.generators.pop(name)()
         if value is not None:
             self.register(name, value)
-        del self.generators[name]
-        return self.registered[name]
 
     def __iter__(self):
         _coconut_yield_from = self.registered
         for _coconut_yield_item in _coconut_yield_from:
             yield _coconut_yield_item
 
-        _coconut_yield_from = self.generators
-        for _coconut_yield_item in _coconut_yield_from:
-            yield _coconut_yield_item
-
+        for name in self.generators:
+            if name not in self.registered:
+                yield name
 
     def run_all_gens(self):
         """Run all generators."""
-        for name in self.generators:
+# run_gen removes generators as it goes, so we have to iterate over a copy
+        for name in list(self.generators):
             self.run_gen(name)
 
     def items(self):
         """Get all items in the registry as (name, value) pairs."""
-        self.run_all_gens()
+        if self.generators:
+            self.run_all_gens()
         _coconut_yield_from = self.registered.items()
         for _coconut_yield_item in _coconut_yield_from:
             yield _coconut_yield_item
@@ -95,16 +98,21 @@ class Registry(_coconut.object):
 
     def asdict(self):
         """Convert registry to dictionary."""
-        self.run_all_gens()
+        if self.generators:
+            self.run_all_gens()
         return self.registered
 
 
 backend_registry = Registry("backend")
 
 
-def init_backend(name, examples, params, *args, **options):
-    """Create a backend object of the given name with the given data."""
-    return backend_registry[name](examples, params, *args, **options)
+def init_backend(name, examples, params, *args, columns=None, **options):
+    """Create a backend object of the given name with the given data. If passed,
+    columns are only given to backends that set uses_columns."""
+    backend_cls = backend_registry[name]
+    if columns is not None and getattr(backend_cls, "uses_columns", False):
+        options["columns"] = columns
+    return backend_cls(examples, params, *args, **options)
 
 
 alg_registry = Registry("algorithm")
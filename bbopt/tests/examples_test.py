@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0xa35e5b9
+# __coconut_hash__ = 0x830dc350
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -117,6 +117,21 @@ mixture_data = os.path.join(example_dir, "mixture_example.bbopt.pickle")
 json_file = os.path.join(example_dir, "json_example.py")
 json_data = os.path.join(example_dir, "json_example.bbopt.json")
 
+msgpack_file = os.path.join(example_dir, "msgpack_example.py")
+msgpack_data = os.path.join(example_dir, "msgpack_example.bbopt.msgpack")
+
+orjson_file = os.path.join(example_dir, "orjson_example.py")
+orjson_data = os.path.join(example_dir, "orjson_example.bbopt.json")
+
+loop_file = os.path.join(example_dir, "loop_example")
+loop_data = os.path.join(example_dir, "loop_example.bbopt.pickle")
+
+interleaved_file = os.path.join(example_dir, "interleaved_example")
+interleaved_data = os.path.join(example_dir, "interleaved_example.bbopt.pickle")
+
+round_trip_file = os.path.join(example_dir, "round_trip_example")
+round_trip_data = {"orjson": os.path.join(example_dir, "round_trip_example.bbopt.json"), "msgpack": os.path.join(example_dir, "round_trip_example.bbopt.msgpack")}
+
 
 # Tests:
 
@@ -223,3 +238,104 @@ class TestExamples(unittest.TestCase):
             reload(json_example)
             assert json_example.y == want
             assert json_example.bb.num_examples == NUM_TRIALS
+
+    def test_msgpack(self):
+        print("\ntest msgpack:")
+        with using(msgpack_data):
+            from bbopt.examples import msgpack_example
+            assert msgpack_example.y == 5
+
+            results = call_test(["bbopt", msgpack_file, "-n", str(NUM_TRIALS), "-j", "4"])
+            want = min(get_nums(results, numtype=float))
+            assert os.path.exists(msgpack_data)
+
+            reload(msgpack_example)
+            assert msgpack_example.y == want
+            assert 0 <= msgpack_example.y <= 20
+            assert msgpack_example.bb.num_examples == NUM_TRIALS
+
+    def test_orjson(self):
+        print("\ntest orjson:")
+        with using(orjson_data):
+            from bbopt.examples import orjson_example
+            assert orjson_example.y == 5.5
+
+            results = call_test(["bbopt", orjson_file, "-n", str(NUM_TRIALS), "-j", "4"])
+            want = min(get_nums(results, numtype=float))
+            assert os.path.exists(orjson_data)
+
+            reload(orjson_example)
+            assert orjson_example.y == want
+            assert 0 <= orjson_example.y <= 11
+            assert orjson_example.bb.num_examples == NUM_TRIALS
+
+    def test_round_trip(self):
+        print("\ntest round_trip:")
+        from math import isnan
+        from bbopt import BlackBoxOptimizer
+        for protocol, data_file in round_trip_data.items():
+            with using(data_file, rem_on_end=True):
+                bb = BlackBoxOptimizer(file=round_trip_file, protocol=protocol)
+                seeds = []
+                for i in range(3):
+                    bb.run(alg="random")
+                    seeds.append(bb.getrandbits("seed", 100))
+                    bb.choice("act", [None, "relu"])
+                    if protocol == "msgpack":
+                        bb.remember({1: "one"})
+                    bb.minimize(float("nan") if i == 0 else float(i))
+
+                bb = BlackBoxOptimizer(file=round_trip_file, protocol=protocol)
+                examples = bb.get_data()["examples"]
+                assert len(examples) == 3
+                assert isnan(examples[0]["loss"])
+                assert [ex["values"]["seed"] for ex in examples] == seeds
+                if protocol == "msgpack":
+                    assert examples[0]["memo"] == {1: "one"}
+                bb.get_optimal_run()
+
+    def test_loop(self):
+        print("\ntest loop:")
+        with using(loop_data, rem_on_end=True):
+            from bbopt import BlackBoxOptimizer
+            from bbopt.constants import compaction_interval
+            num_runs = compaction_interval + 5
+
+            bb = BlackBoxOptimizer(file=loop_file)
+            for i in range(num_runs):
+                bb.run()
+                if i == 0:
+                    bb.randrange("only_first_run", 10)
+                x = bb.uniform("x", 0, 10)
+                bb.minimize(x)
+            assert set(bb.get_data()["params"]) == _coconut.set(("only_first_run", "x"))
+
+            bb = BlackBoxOptimizer(file=loop_file)
+            assert set(bb.get_data()["params"]) == _coconut.set(("only_first_run", "x"))
+            assert bb.num_examples == num_runs
+            assert "only_first_run" in bb.get_data()["examples"][0]["values"]
+
+    def test_interleaved(self):
+        print("\ntest interleaved:")
+        with using(interleaved_data, rem_on_end=True):
+            from bbopt import BlackBoxOptimizer
+            from bbopt.constants import compaction_interval
+
+            bb1 = BlackBoxOptimizer(file=interleaved_file)
+            bb2 = BlackBoxOptimizer(file=interleaved_file)
+            for i in range(compaction_interval):
+                for bb in (bb1, bb2):
+                    bb.run()
+                    bb.minimize(bb.uniform("x", 0, 10))
+# each optimizer should see the other's runs as soon as it saves
+                assert bb1.num_examples == 2 * i + 1
+                assert bb2.num_examples == 2 * i + 2
+
+# bb1 compacts the file and then appends past where bb2 last saw it
+            for _ in range(compaction_interval):
+                bb1.run(alg="random")
+                bb1.minimize(bb1.uniform("x", 0, 10))
+            bb2.run(alg="random")
+            bb2.minimize(bb2.uniform("x", 0, 10))
+            assert bb2.num_examples == 3 * compaction_interval + 1
+            assert BlackBoxOptimizer(file=interleaved_file).num_examples == 3 * compaction_interval + 1
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0x8d12bacb
+# __coconut_hash__ = 0x4ca45613
 
 # Compiled with Coconut version 1.4.0-post_dev23 [Ernest Scribbler]
 
@@ -28,6 +28,7 @@ if _coconut_sys.version_info >= (3,):
 
 import os
 sys = _coconut_sys
+import math
 if _coconut_sys.version_info < (3, 3):
     from collections import Mapping
 else:
@@ -75,7 +76,10 @@ def denumpy(obj, fallback=None):
 
 def denumpy_all(obj):
     """Recursively apply denumpy to the given obj."""
-    if isinstance(obj, (list, tuple)):
+    if type(obj) in (int, float, bool, str):
+# fast path for the most common leaves
+        return obj
+    elif isinstance(obj, (list, tuple)):
         return fmap(denumpy_all, obj)
     elif isinstance(obj, dict):
         return dict(((denumpy_all(k)), (denumpy_all(v))) for k, v in obj.items())
@@ -111,15 +115,31 @@ def json_serialize(obj):
     raise TypeError("cannot JSON serialize {}".format(obj))
 
 
+def has_nonfinite(obj):
+    """Determine whether obj is or contains any NaN or infinite floats."""
+    if isinstance(obj, (float, np.floating)):
+        return math.isnan(obj) or math.isinf(obj)
+    elif isinstance(obj, np.ndarray):
+        return np.issubdtype(obj.dtype, np.floating) and not np.isfinite(obj).all()
+    elif isinstance(obj, Mapping):
+        return any((has_nonfinite(v) for v in obj.values()))
+    elif isinstance(obj, (list, tuple)):
+        return any((has_nonfinite(x) for x in obj))
+    else:
+        return False
+
+
 def sorted_items(params):
     """Return an iterator of the dict's items sorted by its keys."""
     return sorted(params.items())
 
 
-def best_example(examples):
-    """Return the best example seen so far."""
-    selected_example = {"values": {}}
-    max_gain, min_loss = None, None
+def best_example(examples, selected_example=None):
+    """Return the best example seen so far. If selected_example is passed,
+    it is treated as the best of some previous examples."""
+    if selected_example is None:
+        selected_example = {"values": {}}
+    max_gain, min_loss = selected_example.get("gain"), selected_example.get("loss")
     for example in examples:
         _coconut_match_to = example
         _coconut_case_check_0 = False
@@ -155,6 +175,69 @@ def best_example(examples):
     return selected_example
 
 
+def negate_objective(objective):
+    """Take the negative of the given objective (converts a gain into a loss and vice versa)."""
+    if isinstance(objective, Iterable):
+        return (list)(map(negate_objective, objective))
+    else:
+        return -objective
+
+
+class ExampleColumns(_coconut.object):
+    """Column-oriented copy of a list of examples, storing the loss (or negated gain)
+    of every example as well as a column of values for every parameter."""
+# placeholder for parameters that are missing from an example
+    missing = object()
+
+    def __init__(self):
+        self.losses = []
+        self.values = {}
+
+    def __len__(self):
+        return len(self.losses)
+
+    def append(self, example):
+        """Add the given example as a new row."""
+        _coconut_match_to = example
+        _coconut_case_check_1 = False
+        if _coconut.isinstance(_coconut_match_to, _coconut.abc.Mapping):
+            _coconut_match_temp_0 = _coconut_match_to.get("values", _coconut_sentinel)
+            _coconut_match_temp_1 = _coconut_match_to.get("gain", _coconut_sentinel)
+            if (_coconut_match_temp_0 is not _coconut_sentinel) and (_coconut_match_temp_1 is not _coconut_sentinel):
+                values = _coconut_match_temp_0
+                gain = _coconut_match_temp_1
+                _coconut_case_check_1 = True
+        if _coconut_case_check_1:
+            loss = negate_objective(gain)
+        if not _coconut_case_check_1:
+            if _coconut.isinstance(_coconut_match_to, _coconut.abc.Mapping):
+                _coconut_match_temp_0 = _coconut_match_to.get("values", _coconut_sentinel)
+                _coconut_match_temp_1 = _coconut_match_to.get("loss", _coconut_sentinel)
+                if (_coconut_match_temp_0 is not _coconut_sentinel) and (_coconut_match_temp_1 is not _coconut_sentinel):
+                    values = _coconut_match_temp_0
+                    loss = _coconut_match_temp_1
+                    _coconut_case_check_1 = True
+            if _coconut_case_check_1:
+                pass
+        if not _coconut_case_check_1:
+            raise ValueError("invalid example {_coconut_format_0}".format(_coconut_format_0=(example)))
+        row = len(self)
+        for name, value in values.items():
+            col = self.values.setdefault(name, [])
+# columns are only padded with missing as values get added after a gap
+            if len(col) < row:
+                col.extend([self.missing] * (row - len(col)))
+            col.append(value)
+        self.losses.append(loss)
+
+    def column(self, name):
+        """Get the value of the given parameter for every example (or missing if absent)."""
+        col = self.values.get(name, [])
+        if len(col) < len(self):
+            col = col + [self.missing] * (len(self) - len(col))
+        return col
+
+
 def all_isinstance(objs, types):
     """Return whether all the objects have the desired type(s)."""
     return (all)(map(_coconut_partial(isinstance, {1: types}, 2), objs))
@@ -171,6 +254,13 @@ def sync_file(file_handle):
     os.fsync(file_handle.fileno())
 
 
+def file_state(file_handle):
+    """Get a (size, modification time) pair for the given file that
+    changes whenever anyone writes to it."""
+    stat = os.fstat(file_handle.fileno())
+    return stat.st_size, stat.st_mtime
+
+
 def ensure_file(fpath):
     """Ensure that the given file exists."""
     if sys.version_info >= (3,):